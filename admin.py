@@ -2,6 +2,8 @@
 import csv
 import os
 
+import file_lock
+
 TRAINS_FILE = "trains.csv"
 ADMIN_USERNAME = "roboboy"
 ADMIN_PASSWORD = "roboboy"
@@ -39,9 +41,12 @@ def add_train():
         print("Make sure Train No and Train Name are provided and Seats is a number.\n")
         return
 
-    with open(TRAINS_FILE, mode="a", newline="") as f:
-        writer = csv.writer(f)
-        writer.writerow([train_no, train_name, source, destination, seats])
+    # booking rewrites trains.csv under the same lock; an unlocked append
+    # could land in a file that is about to be replaced
+    with file_lock.locked():
+        with open(TRAINS_FILE, mode="a", newline="") as f:
+            writer = csv.writer(f)
+            writer.writerow([train_no, train_name, source, destination, seats])
 
     print(f"\n✅ Train {train_no} - '{train_name}' added successfully.\n")
 
@@ -3,23 +3,52 @@ import random
 import datetime
 import os
 
+import booking_archive
+import booking_index
+import fares
+import file_lock
+
 TRAINS_FILE = "trains.csv"
 BOOKINGS_FILE = "bookings.csv"
-
-# Try to import prompt_toolkit (optional)
-try:
-    from prompt_toolkit import prompt
-    from prompt_toolkit.completion import WordCompleter
-    from prompt_toolkit.shortcuts import CompleteStyle
-    HAS_PROMPT_TOOLKIT = True
-except Exception:
-    HAS_PROMPT_TOOLKIT = False
+BOOKINGS_HEADER = [
+    "PNR", "Username", "Passenger Name", "Age", "Gender",
+    "Source", "Destination", "Travel Date",
+    "Train Name", "Train No", "Booking Time", "Class", "Fare"
+]
+
+# date on which completed journeys were last moved to the archive
+_last_archive_day = None
+
+# prompt_toolkit is optional and slow to import, so it is only loaded the
+# first time a station prompt is shown (None = not tried yet)
+HAS_PROMPT_TOOLKIT = None
+
+# trains.csv is parsed on the first search and re-read only when it changes
+# (new inode, mtime or size)
+_trains_cache = {"stamp": None, "trains": {}}
+
+def load_prompt_toolkit():
+    """Import prompt_toolkit on first use; return True if it is available."""
+    global HAS_PROMPT_TOOLKIT, prompt, WordCompleter, CompleteStyle
+    if HAS_PROMPT_TOOLKIT is None:
+        try:
+            from prompt_toolkit import prompt
+            from prompt_toolkit.completion import WordCompleter
+            from prompt_toolkit.shortcuts import CompleteStyle
+            HAS_PROMPT_TOOLKIT = True
+        except Exception:
+            HAS_PROMPT_TOOLKIT = False
+    return HAS_PROMPT_TOOLKIT
 
 # === Generate Unique PNR ===
-def generate_pnr():
+def generate_pnr(taken=()):
+    """Return a PNR not in `taken` (the PNRs already issued)."""
     prefix = "PNR"
-    unique_id = random.randint(100000, 999999)
-    return f"{prefix}{unique_id}"
+    while True:
+        unique_id = random.randint(100000, 999999)
+        pnr = f"{prefix}{unique_id}"
+        if pnr not in taken:
+            return pnr
 
 # === Validate Passenger Name ===
 def is_valid_name(name):
@@ -100,6 +129,21 @@ def load_trains():
         }
     return trains
 
+# === Cached train catalog (reloaded when trains.csv changes) ===
+def get_trains():
+    try:
+        st = os.stat(TRAINS_FILE)
+    except FileNotFoundError:
+        return load_trains()  # prints the missing-file message
+
+    # inode too: sessions replace the file, and a same-size rewrite can
+    # land within one mtime tick
+    stamp = (st.st_ino, st.st_mtime_ns, st.st_size)
+    if _trains_cache["stamp"] != stamp:
+        _trains_cache["trains"] = load_trains()
+        _trains_cache["stamp"] = stamp
+    return _trains_cache["trains"]
+
 # ===== Helper: build station list from loaded trains =====
 def get_unique_stations(trains):
     """Return a sorted list of unique station names from trains dict."""
@@ -141,7 +185,7 @@ def suggest_station_input(prompt_text, stations):
         return input(prompt_text).strip().title()
 
     # If prompt_toolkit installed — use it (supports mouse selection in many terminals)
-    if HAS_PROMPT_TOOLKIT:
+    if load_prompt_toolkit():
         try:
             completer = WordCompleter(stations, ignore_case=True, match_middle=True)
             result = prompt(
@@ -215,7 +259,17 @@ def select_travel_date():
         except ValueError:
             print("❌ Please enter a number.")
 
+# === Rewrite trains.csv atomically (readers never see a half-written file) ===
+def write_trains(rows):
+    tmp_file = f"{TRAINS_FILE}.{os.getpid()}.tmp"
+    with open(tmp_file, "w", newline="", encoding="utf-8") as file:
+        writer = csv.writer(file)
+        writer.writerows(rows)
+    os.replace(tmp_file, TRAINS_FILE)
+    _trains_cache["stamp"] = None
+
 # === Update Seat Count in trains.csv (reduce seats when booking) ===
+# Callers hold file_lock.locked() so the read-modify-write is not interleaved.
 def update_seat_count(train_no, seats_to_reduce):
     if not os.path.exists(TRAINS_FILE):
         print("❌ trains file missing.")
@@ -256,13 +310,12 @@ def update_seat_count(train_no, seats_to_reduce):
         updated_rows.append(updated_row)
 
     # write back
-    with open(TRAINS_FILE, "w", newline="", encoding="utf-8") as file:
-        writer = csv.writer(file)
-        writer.writerows(updated_rows)
+    write_trains(updated_rows)
 
     return updated
 
 # === Restore Seat After Cancellation (adds seats back to trains.csv) ===
+# Callers hold file_lock.locked(), as for update_seat_count.
 def restore_seat(train_no, seats_to_add):
     if not os.path.exists(TRAINS_FILE):
         # no trains file — nothing to restore
@@ -293,15 +346,13 @@ def restore_seat(train_no, seats_to_add):
         updated_row = [row_dict.get(h, "") for h in header]
         updated_rows.append(updated_row)
 
-    with open(TRAINS_FILE, "w", newline="", encoding="utf-8") as file:
-        writer = csv.writer(file)
-        writer.writerows(updated_rows)
+    write_trains(updated_rows)
 
 # === Ticket Booking (MULTI-PASSENGER ENABLED) ===
 def book_ticket(username):
     print("\n==== Railway Ticket Booking ====")
 
-    trains = load_trains()
+    trains = get_trains()
     if not trains:
         print("❌ No trains available! Please contact admin.")
         return
@@ -367,57 +418,113 @@ def book_ticket(username):
         except ValueError:
             print("❌ Enter a valid number.")
 
-    # Step 5: Travel Date
+    # Step 5: Travel Class
+    print("\n💺 Choose Travel Class:")
+    class_codes = list(fares.TRAVEL_CLASSES)
+    for i, code in enumerate(class_codes, start=1):
+        print(f"{i}. {fares.TRAVEL_CLASSES[code][0]} ({code})")
+    while True:
+        try:
+            choice = int(input(f"Select Class (1–{len(class_codes)}): "))
+            if 1 <= choice <= len(class_codes):
+                travel_class = class_codes[choice - 1]
+                break
+            else:
+                print("❌ Invalid choice! Try again.")
+        except ValueError:
+            print("❌ Enter a valid number.")
+
+    # price off the cached fare table, using the load factor before this booking.
+    # Archived journeys still hold their seats, so they count as sold.
+    fares.ensure_fare_table(trains)
+    seats_sold = booking_index.train_sold(BOOKINGS_FILE, train_no) + booking_archive.archived_sold(train_no)
+    load_factor = fares.load_factor(available_seats, seats_sold)
+    total_fare = 0
+
+    # Step 6: Travel Date
     travel_date = select_travel_date()
-    booking_time = datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-    file_exists = os.path.isfile(BOOKINGS_FILE)
 
-    with open(BOOKINGS_FILE, "a", newline="", encoding="utf-8") as file:
-        writer = csv.writer(file)
-        if not file_exists:
-            writer.writerow([
-                "PNR", "Username", "Passenger Name", "Age", "Gender",
-                "Source", "Destination", "Travel Date",
-                "Train Name", "Train No", "Booking Time"
-            ])
-
-        for i in range(num_passengers):
-            print(f"\n👤 Enter details for Passenger {i+1}:")
-            while True:
-                name = input("Passenger Name: ").strip().title()
-                if not is_valid_name(name):
-                    print("❌ Name should contain only letters (A–Z). Try again.")
-                else:
-                    break
+    # Step 7: Passenger Details
+    passengers = []
+    for i in range(num_passengers):
+        print(f"\n👤 Enter details for Passenger {i+1}:")
+        while True:
+            name = input("Passenger Name: ").strip().title()
+            if not is_valid_name(name):
+                print("❌ Name should contain only letters (A–Z). Try again.")
+            else:
+                break
 
-            while True:
-                age = input("Age: ").strip()
-                if not is_valid_age(age):
-                    print("❌ Age should be a valid number between 1–120.")
-                else:
-                    break
+        while True:
+            age = input("Age: ").strip()
+            if not is_valid_age(age):
+                print("❌ Age should be a valid number between 1–120.")
+            else:
+                break
 
-            gender = input("Gender (M/F/O): ").upper().strip()
-            pnr = generate_pnr()
-
-            ticket_data = [
-                pnr, username, name, age, gender,
-                source, destination, travel_date, train_name, train_no, booking_time
-            ]
-            writer.writerow(ticket_data)
-
-            print(f"✅ Passenger {i+1} booked successfully! PNR: {pnr}")
-
-    # Step 6: Update Seat Count
-    if update_seat_count(train_no, num_passengers):
-        print(f"\n🎫 {num_passengers} Ticket(s) booked successfully!")
-        print(f"🚆 Train: {train_name} ({train_no})")
-        print(f"📍 Route: {source} → {destination}")
-        print(f"🗓️ Date: {travel_date}")
-        print(f"🕒 Booking Time: {booking_time}")
-        print("==================================")
-    else:
-        print("❌ Booking failed due to seat unavailability.")
+        gender = input("Gender (M/F/O): ").upper().strip()
+        fare = fares.quote_fare(train_no, source, destination, travel_class, age, load_factor)
+        total_fare += fare
+        passengers.append((name, age, gender, fare))
+
+    # Step 8: Reserve seats, then write tickets. Both happen under the ledger
+    # lock so parallel sessions can neither oversell nor lose each other's rows.
+    booking_time = datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+    with file_lock.locked():
+        if not update_seat_count(train_no, num_passengers):
+            print("❌ Booking failed due to seat unavailability.")
+            return
+
+        # archived PNRs stay reserved, so history never has two owners per PNR
+        taken = booking_index.issued_pnrs(BOOKINGS_FILE) | booking_archive.archived_pnrs()
+        file_exists = os.path.isfile(BOOKINGS_FILE)
+        with open(BOOKINGS_FILE, "a", newline="", encoding="utf-8") as file:
+            writer = csv.writer(file)
+            if not file_exists:
+                writer.writerow(BOOKINGS_HEADER)
+
+            for i, (name, age, gender, fare) in enumerate(passengers, start=1):
+                pnr = generate_pnr(taken)
+                taken.add(pnr)
+                ticket_data = [
+                    pnr, username, name, age, gender,
+                    source, destination, travel_date, train_name, train_no, booking_time,
+                    travel_class, fare
+                ]
+                writer.writerow(ticket_data)
+                print(f"✅ Passenger {i} booked successfully! PNR: {pnr} — Fare: ₹{fare}")
+
+    print(f"\n🎫 {num_passengers} Ticket(s) booked successfully!")
+    print(f"🚆 Train: {train_name} ({train_no})")
+    print(f"📍 Route: {source} → {destination}")
+    print(f"🗓️ Date: {travel_date}")
+    print(f"💺 Class: {fares.TRAVEL_CLASSES[travel_class][0]}")
+    print(f"💰 Total Fare: ₹{total_fare}")
+    print(f"🕒 Booking Time: {booking_time}")
+    print("==================================")
+
+# === Archive completed journeys (at most once a day per session) ===
+def archive_if_due():
+    global _last_archive_day
+    today = datetime.date.today()
+    if _last_archive_day != today:
+        # None = ledger busy; leave the day unset so the next call retries
+        if booking_archive.archive_past_bookings(BOOKINGS_FILE, today) is not None:
+            _last_archive_day = today
+
+# === Print a table of booking rows (shared by the active and past views) ===
+def print_bookings_table(bookings):
+    print(f"{'SL No.':<7}{'PNR':<12}{'Journey Date':<15}{'From → To':<30}{'Train Name':<25}{'Train No.':<10}{'Fare':<8}")
+    print("-" * 108)
+    for i, row in enumerate(bookings, start=1):
+        pnr = row[0]
+        journey_date = row[7] if len(row) > 7 else ""
+        route = f"{row[5]} → {row[6]}" if len(row) > 6 else ""
+        train_name = row[8] if len(row) > 8 else ""
+        train_no = row[9] if len(row) > 9 else ""
+        fare = f"₹{row[12]}" if len(row) > 12 else "-"
+        print(f"{i:<7}{pnr:<12}{journey_date:<15}{route:<30}{train_name:<25}{train_no:<10}{fare:<8}")
+    print("-" * 108)
 
 # === View Bookings ===
 def view_bookings(username):
@@ -425,31 +532,28 @@ def view_bookings(username):
         print("No bookings found.")
         return
 
+    archive_if_due()
+
     print(f"\n==== Your Bookings ({username}) ====")
-    with open(BOOKINGS_FILE, "r", encoding="utf-8") as file:
-        reader = csv.reader(file)
-        rows = list(reader)
+    # only rows appended since the last call are parsed (see booking_index)
+    bookings = booking_index.user_bookings(BOOKINGS_FILE, username)
 
-    if len(rows) <= 1:
+    if bookings:
+        print_bookings_table(bookings)
+    else:
         print("😕 You have no active bookings.")
-        return
 
-    header = rows[0]
-    bookings = [row for row in rows[1:] if len(row) > 1 and row[1] == username]
+# === View Past Journeys (read from the monthly archive) ===
+def view_past_bookings(username):
+    if os.path.exists(BOOKINGS_FILE):
+        archive_if_due()
 
+    bookings = booking_archive.archived_bookings(username)
+    print(f"\n==== Your Past Journeys ({username}) ====")
     if bookings:
-        print(f"{'SL No.':<7}{'PNR':<12}{'Journey Date':<15}{'From → To':<30}{'Train Name':<25}{'Train No.':<10}")
-        print("-" * 100)
-        for i, row in enumerate(bookings, start=1):
-            pnr = row[0]
-            journey_date = row[7]
-            route = f"{row[5]} → {row[6]}"
-            train_name = row[8]
-            train_no = row[9]
-            print(f"{i:<7}{pnr:<12}{journey_date:<15}{route:<30}{train_name:<25}{train_no:<10}")
-        print("-" * 100)
+        print_bookings_table(bookings)
     else:
-        print("😕 You have no active bookings.")
+        print("😕 You have no past journeys.")
 
 # === Cancel Ticket (improved: supports multiple cancel & safer matching) ===
 def cancel_ticket(username):
@@ -457,17 +561,9 @@ def cancel_ticket(username):
         print("❌ No bookings available to cancel.")
         return
 
-    # read all rows
-    with open(BOOKINGS_FILE, "r", encoding="utf-8") as file:
-        reader = csv.reader(file)
-        rows = list(reader)
+    archive_if_due()
 
-    if len(rows) <= 1:
-        print("❌ No bookings found.")
-        return
-
-    header = rows[0]
-    user_bookings = [row for row in rows[1:] if len(row) > 1 and row[1] == username]
+    user_bookings = booking_index.user_bookings(BOOKINGS_FILE, username)
 
     if not user_bookings:
         print("😕 You have no bookings to cancel.")
@@ -519,32 +615,43 @@ def cancel_ticket(username):
         print("❌ No valid bookings selected.")
         return
 
-    # collect PNRs and train_nos to restore seats
-    pnrs_to_cancel = []
-    train_restore_count = {}  # train_no -> seats to restore
-
-    for i in valid_indices:
-        row = user_bookings[i]
-        if len(row) < 10:
-            # if format unexpected, skip
-            continue
-        pnr = row[0]
-        train_no = row[9]
-        pnrs_to_cancel.append(pnr)
-        train_restore_count[train_no] = train_restore_count.get(train_no, 0) + 1
+    # collect PNRs of the selected bookings
+    pnrs_to_cancel = [user_bookings[i][0] for i in valid_indices if len(user_bookings[i]) >= 10]
 
     if not pnrs_to_cancel:
         print("❌ Couldn't parse selected bookings.")
         return
 
-    # Remove selected bookings from rows (match by PNR)
-    updated_rows = [rows[0]] + [r for r in rows[1:] if r[0] not in pnrs_to_cancel]
-    with open(BOOKINGS_FILE, "w", newline="", encoding="utf-8") as file:
-        writer = csv.writer(file)
-        writer.writerows(updated_rows)
-
-    # Restore seats for each train
-    for train_no, seats in train_restore_count.items():
-        restore_seat(train_no, seats)
-
-    print(f"✅ Cancelled {len(pnrs_to_cancel)} booking(s): {', '.join(pnrs_to_cancel)}")
+    # The ledger lock covers re-read, rewrite and seat restore, so a booking
+    # appended meanwhile is not dropped and seats are restored only once.
+    with file_lock.locked():
+        # Remove selected bookings from rows (match by PNR). Seats are restored
+        # only for rows really removed here: another session may have cancelled
+        # some of them already.
+        with open(BOOKINGS_FILE, "r", encoding="utf-8") as file:
+            rows = list(csv.reader(file))
+        removed = [r for r in rows if len(r) >= 10 and r[0] in pnrs_to_cancel and r[1] == username]
+        if not removed:
+            print("❌ The selected booking(s) were already cancelled.")
+            return
+        updated_rows = [r for r in rows if r and r not in removed]
+
+        train_restore_count = {}  # train_no -> seats to restore
+        for row in removed:
+            train_restore_count[row[9]] = train_restore_count.get(row[9], 0) + 1
+
+        # write to a temp file and swap it in, then bump the rewrite generation
+        # so every session's bookings index rebuilds instead of tailing
+        tmp_file = f"{BOOKINGS_FILE}.{os.getpid()}.tmp"  # per process: sessions may cancel at once
+        with open(tmp_file, "w", newline="", encoding="utf-8") as file:
+            writer = csv.writer(file)
+            writer.writerows(updated_rows)
+        os.replace(tmp_file, BOOKINGS_FILE)
+        booking_index.mark_rewritten(BOOKINGS_FILE)
+
+        # Restore seats for each train
+        for train_no, seats in train_restore_count.items():
+            restore_seat(train_no, seats)
+
+    cancelled = [r[0] for r in removed]
+    print(f"✅ Cancelled {len(cancelled)} booking(s): {', '.join(cancelled)}")
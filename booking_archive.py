@@ -0,0 +1,118 @@
+# booking_archive.py
+import csv
+import datetime
+import glob
+import gzip
+import os
+
+import booking_index
+import file_lock
+
+ARCHIVE_DIR = "archive"
+SEGMENT_PATTERN = "bookings-{month}.csv.gz"   # month = YYYY-MM of the travel date
+DATE_FORMAT = "%d-%m-%Y"
+
+# per-train seat counts and issued PNRs of archived rows,
+# rescanned only when a segment changes
+_scan_cache = {"stamp": None, "counts": {}, "pnrs": set()}
+
+def parse_travel_date(value):
+    try:
+        return datetime.datetime.strptime(value.strip(), DATE_FORMAT).date()
+    except ValueError:
+        return None
+
+def segment_path(month):
+    return os.path.join(ARCHIVE_DIR, SEGMENT_PATTERN.format(month=month))
+
+# === Move completed journeys out of the active ledger ===
+def archive_past_bookings(path, today=None):
+    """
+    Move rows of `path` whose travel date is before `today` into monthly
+    gzip segments under ARCHIVE_DIR, keeping only bookings that are still
+    reachable (today onwards) in the active file. Returns rows archived.
+    Rows with an unreadable date stay in the active file.
+    The whole read -> append -> replace runs under the ledger lock; returns
+    None without doing anything if another session holds it.
+    """
+    with file_lock.locked(blocking=False) as held:
+        if not held:
+            return None  # another session holds the ledger; try again later
+        if not os.path.exists(path):
+            return 0
+        today = today or datetime.date.today()
+
+        with open(path, "r", encoding="utf-8") as file:
+            rows = [r for r in csv.reader(file) if r]
+
+        active, segments = [], {}
+        for i, row in enumerate(rows):
+            travel_date = parse_travel_date(row[7]) if len(row) > 7 else None
+            if (i == 0 and row[0].strip().upper() == "PNR") or travel_date is None or travel_date >= today:
+                active.append(row)
+            else:
+                segments.setdefault(travel_date.strftime("%Y-%m"), []).append(row)
+
+        if not segments:
+            return 0
+
+        # append to the archive first, so a crash never loses a booking
+        os.makedirs(ARCHIVE_DIR, exist_ok=True)
+        for month, month_rows in segments.items():
+            # each append adds a gzip member; gzip readers see one continuous file
+            with gzip.open(segment_path(month), "at", newline="", encoding="utf-8") as file:
+                writer = csv.writer(file)
+                writer.writerows(month_rows)
+
+        tmp_file = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_file, "w", newline="", encoding="utf-8") as file:
+            writer = csv.writer(file)
+            writer.writerows(active)
+        os.replace(tmp_file, path)
+        booking_index.mark_rewritten(path)
+        return sum(len(r) for r in segments.values())
+
+# === Query archived (completed) journeys on demand ===
+def archived_months():
+    """Return the archived months (YYYY-MM), oldest first."""
+    prefix, suffix = SEGMENT_PATTERN.split("{month}")
+    names = (os.path.basename(p) for p in glob.glob(os.path.join(ARCHIVE_DIR, prefix + "*" + suffix)))
+    return sorted(n[len(prefix):-len(suffix)] for n in names)
+
+def archived_bookings(username, months=None):
+    """Return `username`'s archived booking rows, oldest month first."""
+    bookings = []
+    for month in months or archived_months():
+        if not os.path.exists(segment_path(month)):
+            continue
+        with gzip.open(segment_path(month), "rt", newline="", encoding="utf-8") as file:
+            bookings.extend(r for r in csv.reader(file) if len(r) > 1 and r[1] == username)
+    return bookings
+
+def _scan_segments():
+    paths = [segment_path(m) for m in archived_months()]
+    stats = [os.stat(p) for p in paths]
+    stamp = tuple((p, st.st_ino, st.st_mtime_ns, st.st_size) for p, st in zip(paths, stats))
+    if _scan_cache["stamp"] != stamp:
+        counts, pnrs = {}, set()
+        for p in paths:
+            with gzip.open(p, "rt", newline="", encoding="utf-8") as file:
+                for row in csv.reader(file):
+                    if row:
+                        pnrs.add(row[0])
+                    if len(row) > 9:
+                        counts[row[9]] = counts.get(row[9], 0) + 1
+        _scan_cache.update(stamp=stamp, counts=counts, pnrs=pnrs)
+    return _scan_cache
+
+def archived_sold(train_no):
+    """
+    Return how many seats on `train_no` belong to archived journeys.
+    Archiving never hands those seats back to trains.csv, so they still
+    count towards the train's capacity.
+    """
+    return _scan_segments()["counts"].get(train_no, 0)
+
+def archived_pnrs():
+    """Return the set of PNRs in the archive (do not modify it)."""
+    return _scan_segments()["pnrs"]
@@ -0,0 +1,191 @@
+# booking_index.py
+import csv
+import json
+import os
+
+# Per-user index of bookings.csv, kept per file path. Each entry remembers
+# the byte offset up to which the file has been parsed, so later calls only
+# read rows appended since then. The index is saved to a sidecar file, so a
+# new CLI session (one per kiosk login) picks up where the last one stopped.
+# Before tailing, the index checks that the file is still the one it parsed:
+# same inode, same rewrite generation, and the first and last parsed lines
+# unchanged. Any mismatch rebuilds it from byte 0.
+_indexes = {}
+
+# Sidecar file holding a counter that every in-place rewrite bumps.
+# Inodes alone are not enough: ext4 hands a freed inode straight back.
+GENERATION_SUFFIX = ".gen"
+
+# Sidecar file holding the saved index (offsets only, not row contents)
+INDEX_SUFFIX = ".idx"
+INDEX_VERSION = 1
+
+def _is_header(row):
+    return bool(row) and row[0].strip().upper() == "PNR"
+
+def _new_index(inode, generation):
+    return {
+        "inode": inode,
+        "generation": generation,
+        "offset": 0,      # bytes parsed so far (always ends on a full line)
+        "first_line": b"", # raw bytes of line 1
+        "last_line": b"", # raw bytes of the last parsed line, ending at offset
+        "rows_seen": 0,   # complete rows parsed so far (header included)
+        "by_user": {},    # username -> byte offsets of their rows, in file order
+        "by_train": {},   # train no -> number of seats booked
+        "pnrs": set(),    # every PNR in the file
+        "tail": [],       # rows from a trailing line with no newline yet
+    }
+
+def _add_lines(index, chunk, start):
+    """Index the complete lines in `chunk`, which begins at byte `start`."""
+    pos = start
+    for line in chunk.splitlines(keepends=True):
+        row_offset, pos = pos, pos + len(line)
+        row = next(csv.reader([line.decode("utf-8")]), [])
+        if not row:
+            continue
+        index["rows_seen"] += 1
+        if index["rows_seen"] == 1 and _is_header(row):
+            continue
+        index["pnrs"].add(row[0])
+        if len(row) > 1:
+            index["by_user"].setdefault(row[1], []).append(row_offset)
+        if len(row) > 9:
+            index["by_train"][row[9]] = index["by_train"].get(row[9], 0) + 1
+
+# === Sidecar persistence ===
+def _save(path, index):
+    data = dict(index, version=INDEX_VERSION, pnrs=list(index["pnrs"]),
+                first_line=index["first_line"].decode("latin-1"),
+                last_line=index["last_line"].decode("latin-1"))
+    del data["tail"]
+    tmp_file = f"{path}{INDEX_SUFFIX}.{os.getpid()}.tmp"
+    try:
+        with open(tmp_file, "w", encoding="utf-8") as file:
+            file.write(json.dumps(data, separators=(",", ":")))
+        os.replace(tmp_file, path + INDEX_SUFFIX)
+    except OSError:
+        pass  # read-only directory etc.: the in-memory index still works
+
+def _load(path):
+    try:
+        with open(path + INDEX_SUFFIX, "r", encoding="utf-8") as file:
+            data = json.load(file)
+        if data.pop("version", None) != INDEX_VERSION:
+            return None
+        data["first_line"] = data["first_line"].encode("latin-1")
+        data["last_line"] = data["last_line"].encode("latin-1")
+        data["pnrs"] = set(data["pnrs"])
+        data["tail"] = []
+        return data
+    except (OSError, ValueError, KeyError, TypeError, AttributeError):
+        return None  # missing or damaged: rebuild
+
+def invalidate(path):
+    """Forget the in-memory index for `path`; the next refresh re-validates the saved one."""
+    _indexes.pop(path, None)
+
+def _read_generation(path):
+    try:
+        with open(path + GENERATION_SUFFIX, "r", encoding="utf-8") as file:
+            return int(file.read().strip() or 0)
+    except FileNotFoundError:
+        return 0
+    except ValueError:
+        return None  # unreadable: treated as changed on every call
+
+def mark_rewritten(path):
+    """
+    Call after replacing `path` with rewritten content. Bumps its generation
+    so every session's index (not just this one) rebuilds on next refresh.
+    """
+    generation = (_read_generation(path) or 0) + 1
+    tmp_file = f"{path}{GENERATION_SUFFIX}.{os.getpid()}.tmp"
+    with open(tmp_file, "w", encoding="utf-8") as file:
+        file.write(str(generation))
+    os.replace(tmp_file, path + GENERATION_SUFFIX)
+    invalidate(path)
+
+def refresh(path):
+    """
+    Bring the index for `path` up to date and return it (None if the file is missing).
+    Only bytes appended since the last call (or the last saved index) are
+    parsed. A different inode, a new generation, a smaller size or a changed
+    first/last line means the file was rewritten and triggers a full rebuild.
+    """
+    try:
+        st = os.stat(path)
+    except FileNotFoundError:
+        invalidate(path)
+        return None
+
+    generation = _read_generation(path)
+    index = _indexes.get(path) or _load(path)
+    if (index is None or generation is None or index["generation"] != generation
+            or index["inode"] != st.st_ino or st.st_size < index["offset"]):
+        index = _new_index(st.st_ino, generation)
+    _indexes[path] = index
+
+    with open(path, "rb") as file:
+        first_line, last_line = index["first_line"], index["last_line"]
+        if last_line:
+            same_first = file.read(len(first_line)) == first_line
+            file.seek(index["offset"] - len(last_line))
+            if not same_first or file.read(len(last_line)) != last_line:
+                index = _indexes[path] = _new_index(st.st_ino, generation)
+        file.seek(index["offset"])
+        chunk = file.read()
+
+    # Only complete lines advance the offset; a trailing partial line is
+    # parsed on every call until its newline arrives.
+    end = chunk.rfind(b"\n") + 1
+    complete, partial = chunk[:end], chunk[end:]
+    if complete:
+        _add_lines(index, complete, index["offset"])
+        if not index["offset"]:
+            index["first_line"] = complete[:complete.find(b"\n") + 1]
+        index["offset"] += len(complete)
+        index["last_line"] = complete[complete.rfind(b"\n", 0, len(complete) - 1) + 1:]
+        _save(path, index)
+
+    index["tail"] = []
+    if partial:
+        row = next(csv.reader([partial.decode("utf-8", errors="replace")]), [])
+        first_row = index["rows_seen"] == 0
+        if len(row) > 1 and not (first_row and _is_header(row)):
+            index["tail"].append(row)
+    return index
+
+def user_bookings(path, username):
+    """Return the booking rows of `username` in file order (header excluded)."""
+    index = refresh(path)
+    if index is None:
+        return []
+    rows = []
+    with open(path, "rb") as file:
+        # the file may have been replaced since refresh; only trust the
+        # offsets if this is still the inode that was indexed
+        if os.fstat(file.fileno()).st_ino != index["inode"]:
+            invalidate(path)
+            return user_bookings(path, username)
+        for offset in index["by_user"].get(username, []):
+            file.seek(offset)
+            rows.append(next(csv.reader([file.readline().decode("utf-8")]), []))
+    rows.extend(r for r in index["tail"] if r[1] == username)
+    return rows
+
+def train_sold(path, train_no):
+    """Return how many seats are booked on `train_no`."""
+    index = refresh(path)
+    if index is None:
+        return 0
+    sold = index["by_train"].get(train_no, 0)
+    return sold + sum(1 for r in index["tail"] if len(r) > 9 and r[9] == train_no)
+
+def issued_pnrs(path):
+    """Return a new set of every PNR currently in `path`."""
+    index = refresh(path)
+    if index is None:
+        return set()
+    return index["pnrs"] | {r[0] for r in index["tail"]}
@@ -0,0 +1,138 @@
+# check_booking_index.py
+"""
+Regression checks for booking_index's incremental tailing.
+
+Each check runs against a throw-away bookings file in a temp directory and
+covers one way the ledger can change under a live or saved index:
+append, in-place rewrite that keeps the inode, shrink, a partial last
+line, a generation bump from another session, and a new session picking
+up the saved sidecar index.
+
+Usage:
+    python check_booking_index.py
+Exit code is 1 if any check fails.
+"""
+import os
+import shutil
+import tempfile
+
+import booking_index
+
+def row(pnr, user, train_no="1"):
+    return f"{pnr},{user},Name,30,M,Howrah,Delhi,01-01-2030,Test Express,{train_no},now,SL,100\n"
+
+def write(path, rows, mode="w"):
+    with open(path, mode, newline="", encoding="utf-8") as file:
+        file.write("".join(rows))
+
+def pnrs(path, user):
+    return [r[0] for r in booking_index.user_bookings(path, user)]
+
+def new_session(path):
+    """Drop the in-memory index, as a fresh CLI process would start."""
+    booking_index.invalidate(path)
+
+# === Checks ===
+def check_append_then_tail(path):
+    write(path, [row("P1", "alice"), row("P2", "bob")])
+    assert pnrs(path, "alice") == ["P1"]
+    index = booking_index._indexes[path]
+    old_offset = index["offset"]
+
+    write(path, [row("P3", "alice")], mode="a")
+    assert pnrs(path, "alice") == ["P1", "P3"]
+    assert booking_index._indexes[path] is index, "append triggered a rebuild"
+    assert index["offset"] == old_offset + len(row("P3", "alice").encode())
+    assert booking_index.train_sold(path, "1") == 3
+
+def check_rewrite_reusing_inode(path):
+    write(path, [row("P1", "alice"), row("P2", "bob")])
+    assert pnrs(path, "alice") == ["P1"]
+    inode = os.stat(path).st_ino
+
+    # another session cancels P1 and new bookings arrive; the file is
+    # rewritten in place (same inode) and ends up larger than the offset
+    write(path, [row("P9", "carol"), row("P2", "bob"), row("P3", "alice"), row("P4", "dave")])
+    assert os.stat(path).st_ino == inode
+    assert pnrs(path, "alice") == ["P3"], "cancelled row still indexed"
+    assert pnrs(path, "carol") == ["P9"], "first row of rewritten file missing"
+    assert booking_index.train_sold(path, "1") == 4
+
+def check_shrink(path):
+    write(path, [row("P1", "alice"), row("P2", "alice"), row("P3", "bob")])
+    assert pnrs(path, "alice") == ["P1", "P2"]
+    write(path, [row("P2", "alice")])
+    assert pnrs(path, "alice") == ["P2"]
+    assert booking_index.issued_pnrs(path) == {"P2"}
+
+def check_partial_last_line(path):
+    write(path, [row("P1", "alice")])
+    line = row("P2", "alice")
+    write(path, [line[:-1]], mode="a")  # no newline yet
+    assert pnrs(path, "alice") == ["P1", "P2"]
+    offset = booking_index._indexes[path]["offset"]
+    assert offset == len(row("P1", "alice").encode()), "partial line advanced the offset"
+
+    write(path, ["\n"], mode="a")
+    assert pnrs(path, "alice") == ["P1", "P2"], "completed line indexed twice"
+    assert booking_index.train_sold(path, "1") == 2
+
+def check_generation_bump(path):
+    write(path, [row("P1", "alice"), row("P2", "bob"), row("P3", "alice")])
+    assert pnrs(path, "bob") == ["P2"]
+
+    # same size, same first and last line: only the generation tells.
+    # Rows are re-read at their offsets, so check what the index caches.
+    write(path, [row("P1", "alice"), row("P5", "bob", train_no="2"), row("P3", "alice")])
+    with open(path + booking_index.GENERATION_SUFFIX, "w", encoding="utf-8") as file:
+        file.write("7")  # as another session's mark_rewritten() would
+    assert pnrs(path, "bob") == ["P5"]
+    assert booking_index.issued_pnrs(path) == {"P1", "P5", "P3"}, "stale PNRs after rewrite"
+    assert booking_index.train_sold(path, "2") == 1
+
+def check_saved_index(path):
+    write(path, [row("P1", "alice"), row("P2", "bob")])
+    assert pnrs(path, "alice") == ["P1"]
+    assert os.path.exists(path + booking_index.INDEX_SUFFIX)
+
+    # next session: resumes from the saved offset instead of byte 0
+    write(path, [row("P3", "alice")], mode="a")
+    new_session(path)
+    saved_offset = booking_index._load(path)["offset"]
+    assert pnrs(path, "alice") == ["P1", "P3"]
+    assert booking_index._indexes[path]["rows_seen"] == 3
+    assert saved_offset == len((row("P1", "alice") + row("P2", "bob")).encode())
+
+    # a saved index for content that has since been rewritten is rejected
+    write(path, [row("P8", "carol"), row("P3", "alice"), row("P4", "alice")])
+    new_session(path)
+    assert pnrs(path, "alice") == ["P3", "P4"]
+    assert pnrs(path, "carol") == ["P8"]
+
+CHECKS = [
+    check_append_then_tail,
+    check_rewrite_reusing_inode,
+    check_shrink,
+    check_partial_last_line,
+    check_generation_bump,
+    check_saved_index,
+]
+
+def main():
+    failures = 0
+    for check in CHECKS:
+        workdir = tempfile.mkdtemp(prefix="railway-index-")
+        path = os.path.join(workdir, "bookings.csv")
+        try:
+            check(path)
+            print(f"✅ {check.__name__}")
+        except AssertionError as exc:
+            failures += 1
+            print(f"❌ {check.__name__}: {exc or 'assertion failed'}")
+        finally:
+            new_session(path)
+            shutil.rmtree(workdir, ignore_errors=True)
+    return 1 if failures else 0
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,135 @@
+# fares.py
+import functools
+import math
+
+# Approximate station coordinates (lat, lon). trains.csv has no distance
+# column, so route distance is estimated from these; rows that use a state
+# name as station get the state's rough centre.
+STATION_COORDS = {
+    "Asansol": (23.68, 86.98), "Barasat": (22.72, 88.48), "Burdwan": (23.23, 87.86),
+    "Chennai": (13.08, 80.27), "Delhi": (28.64, 77.22), "Dhaka": (23.81, 90.41),
+    "Durgapur": (23.52, 87.31), "Guwahati": (26.14, 91.74), "Howrah": (22.58, 88.31),
+    "Kharagpur": (22.33, 87.23), "Kolkata": (22.57, 88.36), "Medinapore": (22.42, 87.32),
+    "Mumbai": (19.08, 72.88), "Nagpur": (21.15, 79.09), "Patna": (25.59, 85.14),
+    "Puri": (19.81, 85.83), "Sealdah": (22.57, 88.37), "Siliguri": (26.73, 88.40),
+    "Tatanagar": (22.77, 86.20), "Varanasi": (25.32, 82.97),
+    "Andhra Pradesh": (15.91, 79.74), "Arunachal Pradesh": (28.22, 94.73),
+    "Assam": (26.20, 92.94), "Bihar": (25.10, 85.31), "Chhattisgarh": (21.28, 81.87),
+    "Goa": (15.30, 74.12), "Gujarat": (22.26, 71.19), "Haryana": (29.06, 76.09),
+    "Himachal Pradesh": (31.10, 77.17), "Jharkhand": (23.61, 85.28),
+    "Karnataka": (15.32, 75.71), "Kerala": (10.85, 76.27), "Madhya Pradesh": (22.97, 78.66),
+    "Maharashtra": (19.75, 75.71), "Manipur": (24.66, 93.91), "Meghalaya": (25.47, 91.37),
+    "Mizoram": (23.16, 92.94), "Nagaland": (26.16, 94.56), "Odisha": (20.95, 85.10),
+    "Punjab": (31.15, 75.34), "Rajasthan": (27.02, 74.22), "Sikkim": (27.53, 88.51),
+    "Tamil Nadu": (11.13, 78.66), "Telangana": (18.11, 79.02), "Tripura": (23.94, 91.99),
+    "Uttar Pradesh": (26.85, 80.95), "Uttarakhand": (30.07, 79.02),
+    "West Bengal": (22.99, 87.85),
+}
+# Alternate spellings found in trains.csv / bookings -> name in STATION_COORDS
+STATION_ALIASES = {"Sealda": "Sealdah", "Shealda": "Sealdah", "Shealdah": "Sealdah"}
+ROUTE_FACTOR = 1.25          # rail track length vs straight-line distance
+MIN_DISTANCE_KM = 50
+DEFAULT_DISTANCE_KM = 500    # stations without coordinates
+
+# Travel classes: code -> (label, fare per km, flat reservation charge)
+TRAVEL_CLASSES = {
+    "SL": ("Sleeper", 0.45, 20),
+    "3A": ("AC 3 Tier", 1.20, 40),
+    "2A": ("AC 2 Tier", 1.75, 50),
+    "1A": ("AC First Class", 2.90, 60),
+}
+
+# Age concessions: (max age inclusive, band, fare multiplier)
+AGE_BANDS = [(4, "infant", 0.0), (11, "child", 0.5), (59, "adult", 1.0), (120, "senior", 0.6)]
+
+# Dynamic pricing: (load factor below, surge multiplier)
+SURGE_STEPS = [(0.50, 1.00), (0.75, 1.10), (0.90, 1.25), (1.01, 1.50)]
+
+# (train_no, source, destination) -> {"distance": km, "base": {class: fare}}
+_fare_table = {}
+
+def _key(train_no, source, destination):
+    return (str(train_no).strip(), source.strip().lower(), destination.strip().lower())
+
+def station_coords(station):
+    """Return (lat, lon) for a station name, resolving known aliases; None if unknown."""
+    name = station.strip().title()
+    return STATION_COORDS.get(STATION_ALIASES.get(name, name))
+
+# === Distance between two stations (great-circle, scaled to rail length) ===
+def route_distance(source, destination):
+    a = station_coords(source)
+    b = station_coords(destination)
+    if a is None or b is None:
+        return DEFAULT_DISTANCE_KM
+    lat1, lon1, lat2, lon2 = map(math.radians, (a[0], a[1], b[0], b[1]))
+    h = math.sin((lat2 - lat1) / 2) ** 2 + math.cos(lat1) * math.cos(lat2) * math.sin((lon2 - lon1) / 2) ** 2
+    km = 2 * 6371 * math.asin(math.sqrt(h)) * ROUTE_FACTOR
+    return max(MIN_DISTANCE_KM, round(km))
+
+def _static_entry(source, destination):
+    distance = route_distance(source, destination)
+    base = {code: distance * per_km + charge for code, (_, per_km, charge) in TRAVEL_CLASSES.items()}
+    return {"distance": distance, "base": base}
+
+# === Precompute static fares for every train route ===
+def build_fare_table(trains):
+    """
+    (Re)build the static fare table from a trains dict as returned by
+    booking.load_trains(). Dynamic quotes cached so far are dropped.
+    """
+    _fare_table.clear()
+    for train_no, info in trains.items():
+        _fare_table[_key(train_no, info["source"], info["destination"])] = \
+            _static_entry(info["source"], info["destination"])
+    _dynamic_quote.cache_clear()
+    return _fare_table
+
+def ensure_fare_table(trains):
+    """Build the fare table on first use only."""
+    if not _fare_table:
+        build_fare_table(trains)
+
+def age_band(age):
+    age = int(age)
+    for max_age, band, _ in AGE_BANDS:
+        if age <= max_age:
+            return band
+    return AGE_BANDS[-1][1]
+
+def load_factor(seats_available, seats_sold):
+    """
+    Fraction of the train's capacity already sold (0.0–1.0).
+    `seats_sold` must include archived journeys: trains.csv only stores
+    the seats still available.
+    """
+    capacity = seats_available + seats_sold
+    return seats_sold / capacity if capacity > 0 else 1.0
+
+def surge_multiplier(factor):
+    for limit, multiplier in SURGE_STEPS:
+        if factor < limit:
+            return multiplier
+    return SURGE_STEPS[-1][1]
+
+@functools.lru_cache(maxsize=4096)
+def _dynamic_quote(key, travel_class, band, load_bucket):
+    entry = _fare_table.get(key)
+    if entry is None:
+        # route not in the table (e.g. train added after it was built)
+        entry = _fare_table[key] = _static_entry(key[1], key[2])
+    concession = next(m for _, b, m in AGE_BANDS if b == band)
+    fare = entry["base"][travel_class] * concession * surge_multiplier(load_bucket / 20)
+    return round(fare)
+
+# === Quote a per-passenger fare (no file access) ===
+def quote_fare(train_no, source, destination, travel_class, age, factor=0.0):
+    """
+    Return the fare in rupees for one passenger.
+    `factor` is the current load factor; it is bucketed in 5% steps so
+    repeated quotes hit the cache.
+    """
+    if travel_class not in TRAVEL_CLASSES:
+        raise ValueError(f"Unknown travel class: {travel_class}")
+    load_bucket = min(20, max(0, int(factor * 20)))
+    return _dynamic_quote(_key(train_no, source, destination), travel_class, age_band(age), load_bucket)
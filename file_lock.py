@@ -0,0 +1,50 @@
+# file_lock.py
+import contextlib
+import os
+
+# fcntl is POSIX-only; where it is missing locking is skipped
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+
+# One lock guards every read-modify-write of trains.csv and bookings.csv
+LEDGER_LOCK = "ledger.lock"
+
+# lock path -> [fd, depth], so nested `locked()` calls in one process don't deadlock
+_held = {}
+
+@contextlib.contextmanager
+def locked(path=LEDGER_LOCK, blocking=True):
+    """
+    Hold an exclusive lock on the sidecar file `path` for the with-block.
+    Yields True while the lock is held, or False if blocking=False and
+    another process holds it. Re-entrant within a process.
+    """
+    if fcntl is None:
+        yield True
+        return
+
+    if path in _held:
+        _held[path][1] += 1
+        try:
+            yield True
+        finally:
+            _held[path][1] -= 1
+        return
+
+    fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o644)
+    try:
+        fcntl.flock(fd, fcntl.LOCK_EX | (0 if blocking else fcntl.LOCK_NB))
+    except BlockingIOError:
+        os.close(fd)
+        yield False
+        return
+
+    _held[path] = [fd, 1]
+    try:
+        yield True
+    finally:
+        del _held[path]
+        fcntl.flock(fd, fcntl.LOCK_UN)
+        os.close(fd)
@@ -0,0 +1,278 @@
+# loadtest.py
+"""
+Load / soak test for the booking flow.
+
+Spawns N simulated terminal users in parallel processes. Each user
+registers, logs in, then (per round) books 1–6 passengers, views and
+optionally cancels bookings by answering the real prompts of users.py,
+login.py and booking.py with scripted input. All CSV files live in a
+throw-away workspace, so the repo data is never touched.
+
+Afterwards the ledger (bookings.csv plus any archived segments) is checked for:
+  * no overbooking      (sold <= capacity, seats never negative)
+  * seats + sold == capacity for every train
+  * unique PNRs
+
+Usage:
+    python loadtest.py --users 20 --rounds 3 --seats 40
+Exit code is 1 if any invariant is violated or an action crashes.
+"""
+import argparse
+import builtins
+import contextlib
+import csv
+import glob
+import gzip
+import io
+import multiprocessing
+import os
+import random
+import shutil
+import tempfile
+import time
+
+import users
+import login
+import booking
+import booking_archive
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+TRAINS_HEADER = ["TRAIN NO", "TRAIN NAME", "SOURCE", "DESTINATION", "NO OF SEATS"]
+
+class ScriptMismatch(Exception):
+    """The CLI asked for something the script did not expect (e.g. a retry prompt)."""
+
+# === Scripted replacement for input() ===
+def scripted_input(steps):
+    """
+    Return an input() replacement answering `steps`, a list of
+    (expected prompt fragment, answer) consumed in place. Any other prompt
+    raises ScriptMismatch.
+    """
+    def fake_input(prompt_text=""):
+        if not steps:
+            raise ScriptMismatch(f"unexpected prompt: {prompt_text.strip()!r}")
+        expected, answer = steps.pop(0)
+        if expected not in prompt_text:
+            raise ScriptMismatch(f"expected {expected!r}, got {prompt_text.strip()!r}")
+        return answer
+
+    return fake_input
+
+# === Workspace setup ===
+def prepare_workspace(workdir, num_trains, seats):
+    """Copy the first `num_trains` trains into `workdir` with `seats` each; return the catalog."""
+    catalog = []
+    with open(os.path.join(HERE, booking.TRAINS_FILE), "r", encoding="utf-8") as file:
+        reader = csv.reader(file)
+        next(reader, None)
+        for row in reader:
+            # train numbers must be unique so seat counts can be reconciled
+            if len(row) < 4 or row[0].strip() in [c[0] for c in catalog]:
+                continue
+            catalog.append([row[0].strip(), row[1].strip(), row[2].strip(), row[3].strip(), seats])
+            if len(catalog) == num_trains:
+                break
+
+    with open(os.path.join(workdir, booking.TRAINS_FILE), "w", newline="", encoding="utf-8") as file:
+        writer = csv.writer(file)
+        writer.writerow(TRAINS_HEADER)
+        writer.writerows(catalog)
+    return catalog
+
+# === Build the prompt script for one booking ===
+def booking_steps(rng, catalog):
+    train_no, _, source, destination, _ = rng.choice(catalog)
+    # book_ticket lists trains on the route in catalog order
+    route = [c[0] for c in catalog
+             if c[2].lower() == source.lower() and c[3].lower() == destination.lower()]
+    num_passengers = rng.randint(1, 6)
+
+    steps = [
+        ("Source Station", source), ("Choose number", ""),
+        ("Destination Station", destination), ("Choose number", ""),
+        ("Select Train", str(route.index(train_no) + 1)),
+        ("How many passengers", str(num_passengers)),
+        ("Select Class", str(rng.randint(1, 4))),
+        ("Select your travel date", str(rng.randint(1, 7))),
+    ]
+    for _ in range(num_passengers):
+        steps += [
+            ("Passenger Name", rng.choice(["Load Tester", "Soak Rider", "Bench Mark"])),
+            ("Age", str(rng.randint(1, 119))),
+            ("Gender", rng.choice("MFO")),
+        ]
+    return steps
+
+def run_op(ops, name, func, arg, steps):
+    """
+    Run one CLI action with scripted input; record (name, seconds, error).
+    The action fails if it raises or returns before using the whole script
+    (e.g. a rejected login or "no bookings to cancel") or ends on a ❌ line.
+    """
+    steps = list(steps)
+    builtins.input = scripted_input(steps)
+    error = None
+    start = time.perf_counter()
+    try:
+        with contextlib.redirect_stdout(io.StringIO()) as out:
+            func(*arg)
+    except ScriptMismatch as exc:
+        error = str(exc)
+    except Exception as exc:
+        error = f"crash: {type(exc).__name__}: {exc}"
+    else:
+        last_line = (out.getvalue().strip().splitlines() or [""])[-1]
+        if steps:
+            error = f"returned before prompt {steps[0][0]!r}: {last_line!r}"
+        elif last_line.startswith("❌"):
+            error = f"rejected: {last_line!r}"
+    ops.append((name, time.perf_counter() - start, error))
+
+# === One simulated user (runs in a worker process) ===
+def init_worker(workdir):
+    os.chdir(workdir)
+    booking.HAS_PROMPT_TOOLKIT = False
+
+def simulate_user(job):
+    user_id, rounds, cancel_rate, catalog, seed = job
+    rng = random.Random(seed)
+    username = f"load{user_id:04d}"
+    password = f"pass{user_id}x"
+    ops = []
+
+    run_op(ops, "register", users.register_user, (),
+           [("Enter username", username), ("Enter password", password)])
+    for _ in range(rounds):
+        run_op(ops, "login", login.login_user, (),
+               [("Enter username", username), ("Enter password", password)])
+        run_op(ops, "book", booking.book_ticket, (username,), booking_steps(rng, catalog))
+        run_op(ops, "view", booking.view_bookings, (username,), [])
+        if rng.random() < cancel_rate:
+            run_op(ops, "cancel", booking.cancel_ticket, (username,),
+                   [("Enter booking numbers", "1")])
+    return ops
+
+# === Invariant checks ===
+def check_invariants(workdir, catalog):
+    """Return a list of human-readable invariant violations (empty if all hold)."""
+    problems = []
+    capacity = {c[0]: c[4] for c in catalog}
+
+    remaining = {}
+    with open(os.path.join(workdir, booking.TRAINS_FILE), "r", encoding="utf-8") as file:
+        reader = csv.reader(file)
+        next(reader, None)
+        for row in reader:
+            if row:
+                remaining[row[0]] = int(row[4])
+
+    # archived journeys keep their seats, so they count as sold too
+    ledger_rows = []
+    bookings_path = os.path.join(workdir, booking.BOOKINGS_FILE)
+    if os.path.exists(bookings_path):
+        with open(bookings_path, "r", encoding="utf-8") as file:
+            ledger_rows.extend(csv.reader(file))
+    segments = os.path.join(workdir, booking_archive.ARCHIVE_DIR,
+                            booking_archive.SEGMENT_PATTERN.format(month="*"))
+    for segment in sorted(glob.glob(segments)):
+        with gzip.open(segment, "rt", newline="", encoding="utf-8") as file:
+            ledger_rows.extend(csv.reader(file))
+
+    sold = {}
+    pnrs = {}
+    for row in ledger_rows:
+        if len(row) < 10 or row[0] == "PNR":
+            continue
+        sold[row[9]] = sold.get(row[9], 0) + 1
+        pnrs[row[0]] = pnrs.get(row[0], 0) + 1
+
+    for train_no, cap in capacity.items():
+        left = remaining.get(train_no, 0)
+        taken = sold.get(train_no, 0)
+        if left < 0 or taken > cap:
+            problems.append(f"train {train_no}: overbooked (sold {taken} of {cap}, seats left {left})")
+        if left + taken != cap:
+            problems.append(f"train {train_no}: seats {left} + sold {taken} != capacity {cap}")
+    for pnr, count in pnrs.items():
+        if count > 1:
+            problems.append(f"PNR {pnr} issued {count} times")
+    return problems
+
+def percentile(values, pct):
+    """Nearest-rank percentile of a non-empty list."""
+    ordered = sorted(values)
+    rank = max(1, int(round(pct / 100 * len(ordered))))
+    return ordered[min(rank, len(ordered)) - 1]
+
+# === Report ===
+def print_report(all_ops, elapsed, problems):
+    print(f"\n==== Load Test Report ({elapsed:.2f}s wall) ====")
+    print(f"{'Operation':<10}{'Count':>7}{'Errors':>8}{'ops/s':>9}{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}{'max ms':>9}")
+    print("-" * 70)
+    for name in ["register", "login", "book", "view", "cancel"]:
+        times = [t * 1000 for n, t, _ in all_ops if n == name]
+        if not times:
+            continue
+        errors = sum(1 for n, _, e in all_ops if n == name and e)
+        print(f"{name:<10}{len(times):>7}{errors:>8}{len(times) / elapsed:>9.1f}"
+              f"{percentile(times, 50):>9.1f}{percentile(times, 95):>9.1f}"
+              f"{percentile(times, 99):>9.1f}{max(times):>9.1f}")
+    print("-" * 70)
+    print(f"Total throughput: {len(all_ops) / elapsed:.1f} ops/s")
+
+    errors = {}
+    for name, _, error in all_ops:
+        if error:
+            errors[f"{name}: {error}"] = errors.get(f"{name}: {error}", 0) + 1
+    if errors:
+        print(f"\n⚠️ Operation errors (top {min(5, len(errors))} of {len(errors)} kinds):")
+        for message, count in sorted(errors.items(), key=lambda kv: kv[1], reverse=True)[:5]:
+            print(f"  {count:>4} x {message}")
+
+    if problems:
+        print(f"\n❌ {len(problems)} invariant violation(s):")
+        for p in problems:
+            print(f"  - {p}")
+    else:
+        print("\n✅ All invariants hold (no overbooking, seats + sold == capacity, unique PNRs).")
+
+def main():
+    parser = argparse.ArgumentParser(description="Concurrent load / soak test for the booking flow.")
+    parser.add_argument("--users", type=int, default=20, help="simulated users (default 20)")
+    parser.add_argument("--procs", type=int, default=0, help="worker processes (default: one per user)")
+    parser.add_argument("--rounds", type=int, default=1, help="book/view/cancel rounds per user (soak)")
+    parser.add_argument("--trains", type=int, default=5, help="trains in the test catalog (default 5)")
+    parser.add_argument("--seats", type=int, default=60, help="capacity per train (default 60)")
+    parser.add_argument("--cancel-rate", type=float, default=0.5, help="chance to cancel per round")
+    parser.add_argument("--seed", type=int, default=None, help="random seed for reproducible runs")
+    parser.add_argument("--keep", action="store_true", help="keep the workspace for inspection")
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix="railway-load-")
+    catalog = prepare_workspace(workdir, args.trains, args.seats)
+    seed = args.seed if args.seed is not None else random.randrange(1 << 30)
+    jobs = [(i, args.rounds, args.cancel_rate, catalog, seed + i) for i in range(1, args.users + 1)]
+    procs = args.procs or args.users
+
+    print(f"Running {args.users} users x {args.rounds} round(s) on {len(catalog)} trains "
+          f"({procs} processes, seed {seed})...")
+    start = time.perf_counter()
+    with multiprocessing.Pool(procs, initializer=init_worker, initargs=(workdir,)) as pool:
+        results = pool.map(simulate_user, jobs)
+    elapsed = time.perf_counter() - start
+
+    all_ops = [op for ops in results for op in ops]
+    problems = check_invariants(workdir, catalog)
+    # an exception inside the booking code is a bug, not an expected rejection
+    problems += [f"{n}: {e}" for n, _, e in all_ops if e and e.startswith("crash:")]
+    print_report(all_ops, elapsed, problems)
+
+    if args.keep:
+        print(f"Workspace kept at {workdir}")
+    else:
+        shutil.rmtree(workdir, ignore_errors=True)
+    return 1 if problems else 0
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -1,17 +1,19 @@
-import users
-import login
-import booking
+# users, login and booking are imported on first use (not at start-up) so
+# the main menu appears immediately; see startup_budget.py
 
 def user_menu(username):
     """Show logged-in user menu until they choose to logout/exit."""
+    import booking
+
     while True:
         print(f"\nWelcome, {username}!")
         print("1️⃣ Book Ticket")
         print("2️⃣ View My Bookings")
         print("3️⃣ Cancel Ticket")
-        print("4️⃣ Logout")
+        print("4️⃣ View Past Journeys")
+        print("5️⃣ Logout")
 
-        opt = input("Choose your option (1-4): ").strip()
+        opt = input("Choose your option (1-5): ").strip()
         if opt == "1":
             booking.book_ticket(username)
         elif opt == "2":
@@ -19,10 +21,12 @@ def user_menu(username):
         elif opt == "3":
             booking.cancel_ticket(username)
         elif opt == "4":
+            booking.view_past_bookings(username)
+        elif opt == "5":
             print(f"👋 Logging out {username}...\n")
             break
         else:
-            print("❌ Invalid choice. Please select 1, 2, 3 or 4.")
+            print("❌ Invalid choice. Please select 1, 2, 3, 4 or 5.")
 
 def main():
     print("==== Welcome to Indian Railway ====")
@@ -35,6 +39,8 @@ def main():
         choice = input("Choose your option (1-3): ").strip()
 
         if choice == "1":
+            import users
+            import login
             users.register_user()
             # After registration, attempt auto-login
             username = login.login_user()
@@ -42,6 +48,7 @@ def main():
                 user_menu(username)
 
         elif choice == "2":
+            import login
             username = login.login_user()
             if username:
                 user_menu(username)
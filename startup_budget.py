@@ -0,0 +1,63 @@
+# startup_budget.py
+"""
+Import-time budget check for CLI start-up.
+
+Runs `python -X importtime -c "import <module>"` a few times, takes the
+fastest run, and fails if the module's cumulative import time exceeds the
+budget. The default checks main.py, which must show its menu without
+pulling in booking / prompt_toolkit.
+
+Usage:
+    python startup_budget.py                       # main, 25 ms budget
+    python startup_budget.py --module booking --budget-ms 60
+Exit code is 1 if the budget is exceeded.
+"""
+import argparse
+import os
+import subprocess
+import sys
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+def measure(module):
+    """Return {imported module: cumulative microseconds} for one fresh interpreter."""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=HERE, capture_output=True, text=True, check=True,
+    )
+    timings = {}
+    for line in result.stderr.splitlines():
+        # "import time:   self [us] |  cumulative | imported package"
+        if not line.startswith("import time:") or "imported package" in line:
+            continue
+        _, cumulative, name = line[len("import time:"):].split("|")
+        timings[name.strip()] = int(cumulative)
+    return timings
+
+def main():
+    parser = argparse.ArgumentParser(description="Check the import-time budget of a module.")
+    parser.add_argument("--module", default="main", help="module to import (default main)")
+    parser.add_argument("--budget-ms", type=float, default=25.0, help="allowed cumulative ms (default 25)")
+    parser.add_argument("--runs", type=int, default=5, help="fresh interpreters to try (best is kept)")
+    parser.add_argument("--top", type=int, default=10, help="slowest imports to list")
+    args = parser.parse_args()
+
+    best = min((measure(args.module) for _ in range(args.runs)),
+               key=lambda t: t.get(args.module, 0))
+    total_ms = best.get(args.module, 0) / 1000
+
+    print(f"==== Import time: {args.module} ====")
+    print(f"{'Module':<45}{'cumulative ms':>15}")
+    print("-" * 60)
+    for name, us in sorted(best.items(), key=lambda kv: kv[1], reverse=True)[:args.top]:
+        print(f"{name:<45}{us / 1000:>15.2f}")
+    print("-" * 60)
+
+    if total_ms > args.budget_ms:
+        print(f"❌ {args.module} imports in {total_ms:.2f} ms — over the {args.budget_ms:g} ms budget.")
+        return 1
+    print(f"✅ {args.module} imports in {total_ms:.2f} ms (budget {args.budget_ms:g} ms).")
+    return 0
+
+if __name__ == "__main__":
+    raise SystemExit(main())